@@ -4,12 +4,26 @@ Complete data processing for Master's Thesis
 Runs everything sequentially - just execute once!
 """
 
+import os
+import hashlib
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
+# Optional fast IO: cache slow Excel sources as Parquet when pyarrow is available
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# pyarrow's CSV reader is multithreaded; fall back to pandas' C parser without it.
+# Only the large e-commerce file uses it (see the float note there)
+CSV_ENGINE = 'pyarrow' if HAS_PYARROW else 'c'
+
 # ============================================================================
 # SETUP
 # ============================================================================
@@ -30,6 +44,45 @@ print("Checking folder structure...")
 (OUTPUTS / "Visualizations").mkdir(parents=True, exist_ok=True)
 print("✓ Folders ready\n")
 
+# Excel parsing is slow (especially the ~100 MB GEDEvent file), so the first
+# run writes a Parquet copy of each sheet next to its workbook and later runs
+# read that instead. Only the requested columns are parsed and cached; the
+# cache name carries the sheet and a digest of the column set, so different
+# subsets of the same sheet never serve each other.
+def load_cached(xlsx_path, sheet_name=None, usecols=None):
+    """Read an Excel sheet, caching the parsed columns as a sibling .parquet for later runs"""
+    xlsx_path = Path(xlsx_path)
+    sheet = 0 if sheet_name is None else sheet_name
+    cols_key = 'all' if usecols is None else hashlib.md5(
+        ','.join(sorted(usecols)).encode()).hexdigest()[:8]
+    cache_path = xlsx_path.with_name(f"{xlsx_path.stem}.{sheet}.{cols_key}.parquet")
+    # Written when a cache write fails, so the failure is reported only once per workbook version
+    failed_path = cache_path.with_suffix('.failed')
+    if (HAS_PYARROW and cache_path.exists()
+            and cache_path.stat().st_mtime >= xlsx_path.stat().st_mtime):
+        return pd.read_parquet(cache_path, engine='pyarrow')
+
+    df = pd.read_excel(xlsx_path, sheet_name=sheet, usecols=usecols)
+    # Mixed-type columns (e.g. GED's gwnoa holds both ints and "2, 200") load
+    # as object, which Parquet cannot store; keep them as text (NaN stays NaN)
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype(str)
+
+    if HAS_PYARROW and not (failed_path.exists()
+                            and failed_path.stat().st_mtime >= xlsx_path.stat().st_mtime):
+        try:
+            df.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+            failed_path.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"  ⚠ Could not write cache {cache_path.name} "
+                  f"(not retried until {xlsx_path.name} changes): {e}")
+            try:
+                cache_path.unlink(missing_ok=True)
+                failed_path.touch()
+            except OSError:
+                pass
+    return df
+
 # ============================================================================
 # STEP 1: DATA INTEGRATION
 # ============================================================================
@@ -41,7 +94,21 @@ print()
 
 # Load E-commerce data
 print("Loading e-commerce data...")
-df_ecom = pd.read_csv(DATA_RAW / "US_ECommerceTotal (1).csv", low_memory=False)
+# Only the label/year/value columns are used; labels load as categoricals
+ECOM_LABEL_COLS = ['Market Label', 'EnterpriseSize Label', 'ECommerceSale Label', 'Economy Label']
+ECOM_VALUE_COLS = ['US$ at current prices in millions', 'Percentage in total turnover']
+ecom_dtype = {**{col: 'category' for col in ECOM_LABEL_COLS}, 'Year': 'int16'}
+# pyarrow rounds some long decimals 1 ulp away from pandas' C parser, which
+# would change the tracked output CSVs; read the values as text and convert
+# them with pd.to_numeric (same float routine as the C parser) after filtering
+if CSV_ENGINE == 'pyarrow':
+    ecom_dtype.update({col: 'str' for col in ECOM_VALUE_COLS})
+df_ecom = pd.read_csv(
+    DATA_RAW / "US_ECommerceTotal (1).csv",
+    usecols=ECOM_LABEL_COLS + ['Year'] + ECOM_VALUE_COLS,
+    dtype=ecom_dtype,
+    engine=CSV_ENGINE
+)
 print(f"  Raw: {len(df_ecom):,} rows")
 
 # Filter to Total market, All enterprises
@@ -50,10 +117,12 @@ df_ecom = df_ecom[
     (df_ecom['EnterpriseSize Label'] == 'All (persons employed)') &
     (df_ecom['ECommerceSale Label'] == 'Total')
 ].copy()
+if CSV_ENGINE == 'pyarrow':
+    df_ecom[ECOM_VALUE_COLS] = df_ecom[ECOM_VALUE_COLS].apply(pd.to_numeric)
 print(f"  Filtered: {len(df_ecom):,} rows")
 
 # Aggregate by country-year
-ecom_agg = df_ecom.groupby(['Economy Label', 'Year'], as_index=False).agg({
+ecom_agg = df_ecom.groupby(['Economy Label', 'Year'], as_index=False, observed=True).agg({
     'US$ at current prices in millions': 'sum',
     'Percentage in total turnover': 'mean'
 }).rename(columns={
@@ -69,25 +138,27 @@ print("Loading Canada detailed e-commerce data...")
 try:
     df_canada_raw = pd.read_csv(DATA_RAW / "Canada_e-com-sales.csv")
     
-    # Extract year and month
+    # Keep only retail e-commerce sales and total retail sales (unadjusted)
+    ECOM_LABEL = 'Retail E-commerce sales, unadjusted'
+    TOTAL_LABEL = 'Retail trade, unadjusted [44-453]'
+    df_canada_raw = df_canada_raw[df_canada_raw['Sales'].isin([ECOM_LABEL, TOTAL_LABEL])].copy()
+    
+    # Extract year and month (only for the rows kept above)
     df_canada_raw['date'] = pd.to_datetime(df_canada_raw['REF_DATE'])
     df_canada_raw['year'] = df_canada_raw['date'].dt.year
     df_canada_raw['month'] = df_canada_raw['date'].dt.month
     
-    # Get retail e-commerce sales (unadjusted)
-    canada_ecom = df_canada_raw[
-        df_canada_raw['Sales'] == 'Retail E-commerce sales, unadjusted'
-    ][['year', 'month', 'VALUE']].copy()
-    canada_ecom = canada_ecom.rename(columns={'VALUE': 'ecom_sales_thousands'})
-    
-    # Get total retail sales
-    canada_total = df_canada_raw[
-        df_canada_raw['Sales'] == 'Retail trade, unadjusted [44-453]'
-    ][['year', 'month', 'VALUE']].copy()
-    canada_total = canada_total.rename(columns={'VALUE': 'total_sales_thousands'})
+    # Both series side by side per month
+    canada_monthly = (
+        df_canada_raw
+        .pivot_table(index=['year', 'month'], columns='Sales', values='VALUE', aggfunc='first')
+        .rename(columns={ECOM_LABEL: 'ecom_sales_thousands', TOTAL_LABEL: 'total_sales_thousands'})
+        .dropna(subset=['ecom_sales_thousands', 'total_sales_thousands'])  # months with both series
+        .rename_axis(columns=None)
+        .reset_index()
+    )
     
-    # Merge and calculate
-    canada_monthly = canada_ecom.merge(canada_total, on=['year', 'month'], how='inner')
+    # Calculate share
     canada_monthly['ecom_share_pct'] = (
         canada_monthly['ecom_sales_thousands'] / canada_monthly['total_sales_thousands'] * 100
     )
@@ -103,10 +174,12 @@ try:
     canada_yearly['country_name'] = 'Canada'
     canada_yearly = canada_yearly[['country_name', 'year', 'ecom_sales_usd_millions', 'ecom_share_pct']]
     
-    # Remove existing Canada data for overlapping years (2016-2022)
+    # Remove existing Canada data for overlapping years (2016-2022); the
+    # monthly series covers a contiguous range, so a bounds check suffices
     canada_years = canada_yearly['year'].values
-    ecom_agg = ecom_agg[~((ecom_agg['country_name'] == 'Canada') & 
-                          (ecom_agg['year'].isin(canada_years)))]
+    ymin, ymax = canada_years.min(), canada_years.max()
+    drop_mask = (ecom_agg['country_name'] == 'Canada') & ecom_agg['year'].between(ymin, ymax)
+    ecom_agg = ecom_agg.loc[~drop_mask]
     
     # Append Canada data
     ecom_agg = pd.concat([ecom_agg, canada_yearly], ignore_index=True)
@@ -122,7 +195,7 @@ except Exception as e:
 
 # Load Classifications
 print("Loading country classifications...")
-df_class = pd.read_excel(DATA_RAW / "CLASS_2025_10_07 (1).xlsx", sheet_name="List of economies")
+df_class = load_cached(DATA_RAW / "CLASS_2025_10_07 (1).xlsx", sheet_name="List of economies")
 df_class = df_class.rename(columns={
     'Economy': 'country_name',
     'Code': 'iso3',
@@ -133,8 +206,10 @@ print(f"✓ Classifications loaded: {len(df_class)} countries\n")
 
 # Merge
 print("Merging datasets...")
-master = ecom_agg.merge(df_class[['country_name', 'iso3', 'region', 'income_group']], 
-                        on='country_name', how='left')
+# df_class has one row per country, so join against its index directly
+# (validate raises if a duplicate country would multiply rows)
+class_idx = df_class.set_index('country_name')[['iso3', 'region', 'income_group']]
+master = ecom_agg.join(class_idx, on='country_name', how='left', validate='m:1')
 
 # Load Internet data
 print("Loading internet penetration data...")
@@ -145,24 +220,38 @@ df_internet = df_internet.rename(columns={
     'Individuals using the Internet (% of population)': 'internet_users_pct'
 })
 
-master = master.merge(df_internet[['iso3', 'year', 'internet_users_pct']], 
-                     on=['iso3', 'year'], how='left')
+# Aggregate rows without a code would otherwise all match on a missing iso3
+no_code = df_internet['iso3'].isna()
+df_internet = df_internet[~no_code]
+print(f"  Dropped {no_code.sum()} internet rows without a country code (regional aggregates)")
+
+master = master.merge(df_internet[['iso3', 'year', 'internet_users_pct']],
+                      on=['iso3', 'year'], how='left', validate='m:1')
 
 print(f"✓ Master dataset: {len(master)} observations\n")
 
 # Remove regions with insufficient data
+# Build the region/classification filters as one mask and copy the frame once
 print("Filtering regions...")
-master = master[master['region'] != 'Latin America & Caribbean'].copy()
+not_latam = master['region'] != 'Latin America & Caribbean'
 print(f"✓ Removed Latin America & Caribbean (insufficient data)")
-print(f"  Remaining: {len(master)} observations\n")
+print(f"  Remaining: {not_latam.sum()} observations\n")
 
 # Remove special administrative regions without proper classification
 print("Removing entries without regional classification...")
-before_count = len(master)
-master = master[master['region'].notna()].copy()
+before_count = not_latam.sum()
 
-# Also remove duplicate entries (Hong Kong SAR, Macao SAR, etc.)
-master = master[~master['country_name'].str.contains('Hong Kong|Macao|SAR', case=False, na=False)].copy()
+# Also remove duplicate entries (Hong Kong SAR, Macao SAR, etc.): match the
+# pattern against the distinct country labels once, then filter rows by lookup
+country_labels = pd.Series(master['country_name'].dropna().unique())
+SAR_LABELS = country_labels[country_labels.str.contains('Hong Kong|Macao|SAR', case=False)].tolist()
+
+keep = (
+    not_latam &
+    master['region'].notna() &
+    ~master['country_name'].isin(SAR_LABELS)
+)
+master = master.loc[keep].copy()
 
 # Fix Malta region - should be Europe, not MENA
 master.loc[master['country_name'] == 'Malta', 'region'] = 'Europe & Central Asia'
@@ -175,7 +264,7 @@ print(f"  Remaining: {len(master)} observations\n")
 print("Ensuring regional consistency...")
 country_years = master.groupby('country_name').size()
 valid_countries = country_years[country_years >= 2].index
-master = master[master['country_name'].isin(valid_countries)].copy()
+master = master.loc[master['country_name'].isin(valid_countries)]
 
 print(f"✓ Kept countries with 2+ years of data")
 print(f"  Countries: {master['country_name'].nunique()}")
@@ -184,8 +273,15 @@ print(f"  Observations: {len(master)}\n")
 # Load SIMPLE conflict data (just GEDEvent for now - ACLED integration would be complex)
 print("Loading conflict data (GEDEvent)...")
 try:
-    df_ged = pd.read_excel(DATA_RAW / "GEDEvent_v25_1.xlsx", 
-                           usecols=['year', 'country', 'best', 'deaths_civilians'])
+    df_ged = load_cached(DATA_RAW / "GEDEvent_v25_1.xlsx",
+                         usecols=['year', 'country', 'best', 'deaths_civilians'])
+    
+    # Keep only events that can match a master country-year before aggregating
+    keep = set(master['country_name'].unique())
+    df_ged = df_ged[
+        df_ged['country'].isin(keep) &
+        df_ged['year'].between(master['year'].min(), master['year'].max())
+    ]
     
     # Aggregate by year
     conflict_agg = df_ged.groupby(['country', 'year'], as_index=False).agg({
@@ -197,7 +293,8 @@ try:
         'deaths_civilians': 'civilian_deaths' 
     })
     
-    master = master.merge(conflict_agg, on=['country_name', 'year'], how='left')
+    master = master.merge(conflict_agg, on=['country_name', 'year'], how='left',
+                          validate='m:1')
     master['conflict_deaths'] = master['conflict_deaths'].fillna(0)
     master['civilian_deaths'] = master['civilian_deaths'].fillna(0)
     print(f"✓ Conflict data merged\n")
@@ -206,9 +303,14 @@ except Exception as e:
     master['conflict_deaths'] = 0
     master['civilian_deaths'] = 0
 
-# Add shock indicators
-master['covid_19_shock'] = ((master['year'] >= 2020) & (master['year'] <= 2022)).astype(int)
-master['ukraine_conflict'] = (master['year'] >= 2022).astype(int)
+# Dictionary-encode repeated labels (all sources are merged by now, so the
+# categories cover every value used below)
+for col in ['country_name', 'iso3', 'region', 'income_group']:
+    master[col] = master[col].astype('category')
+
+# Add shock indicators (0/1 flags, stored as int8)
+master['covid_19_shock'] = ((master['year'] >= 2020) & (master['year'] <= 2022)).astype('int8')
+master['ukraine_conflict'] = (master['year'] >= 2022).astype('int8')
 
 print(f"✓ Final master dataset: {len(master)} rows, {len(master.columns)} columns")
 print(f"  Countries: {master['country_name'].nunique()}")
@@ -225,9 +327,22 @@ print("="*80)
 print()
 
 # Calculate growth rates
+# (after sorting, each row's previous row is the prior year of the same
+# country unless the country code changes there)
 master = master.sort_values(['country_name', 'year'])
-master['ecom_sales_growth'] = master.groupby('country_name')['ecom_sales_usd_millions'].pct_change() * 100
-master['internet_growth'] = master.groupby('country_name')['internet_users_pct'].pct_change() * 100
+country_codes = master['country_name'].cat.codes.to_numpy()
+same_country = np.r_[False, country_codes[1:] == country_codes[:-1]]
+
+def growth_pct(values, same_country):
+    """Year-over-year % change on rows flagged in same_country, NaN elsewhere"""
+    prev = np.roll(values, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(same_country, (values / prev - 1) * 100, np.nan)
+
+master['ecom_sales_growth'] = growth_pct(
+    master['ecom_sales_usd_millions'].to_numpy(dtype=float), same_country)
+master['internet_growth'] = growth_pct(
+    master['internet_users_pct'].to_numpy(dtype=float), same_country)
 
 # Remove ONLY extreme outliers from growth rates (not percentages!)
 # Use more lenient 3*IQR instead of 1.5*IQR to keep more data
@@ -277,10 +392,22 @@ print(f"✓ Development categories:")
 print(master['development_category'].value_counts())
 print()
 
-# Save processed data
+# Save processed data. The CSV is the main dataset; when pyarrow is available a
+# Parquet copy (which keeps dtypes such as categoricals) is written alongside it,
+# otherwise any older copy is removed so readers never pick up a stale panel
 master.to_csv(OUTPUTS / "data" / "master_panel.csv", index=False)
+print("✓ Saved: outputs/data/master_panel.csv")
+master_parquet = OUTPUTS / "data" / "master_panel.parquet"
+if HAS_PYARROW:
+    try:
+        master.to_parquet(master_parquet, engine='pyarrow', compression='zstd', index=False)
+        print("✓ Saved: outputs/data/master_panel.parquet")
+    except Exception as e:
+        master_parquet.unlink(missing_ok=True)
+        print(f"  ⚠ Could not write {master_parquet.name}: {e}")
+else:
+    master_parquet.unlink(missing_ok=True)
 master.to_csv(OUTPUTS / "data" / "analysis_ready.csv", index=False)
-print(f"✓ Saved: outputs/data/master_panel.csv")
 print(f"✓ Saved: outputs/data/analysis_ready.csv\n")
 
 # ============================================================================
@@ -301,7 +428,7 @@ print("✓ Saved: outputs/data/summary_statistics.csv\n")
 
 # Regional comparison
 print("Regional analysis...")
-regional = master.groupby('region').agg({
+regional = master.groupby('region', observed=True).agg({
     'ecom_sales_usd_millions': 'mean',
     'ecom_share_pct': 'mean',
     'internet_users_pct': 'mean',
@@ -367,157 +494,193 @@ def add_crisis_markers(fig, y_range):
         )
     return fig
 
-# Filter data from 2012 onwards for cleaner visualizations
-master_viz = master[master['year'] >= 2012].copy()
+# master is already limited to 2012 onwards (step 2) and is not modified
+# below, so the charts use it directly
+master_viz = master
+
+# Aggregate once and slice per chart: region-year means for the regional
+# charts, and global yearly metrics for the overview charts
+agg = master_viz.groupby(['region', 'year'], observed=True)[
+    ['ecom_share_pct', 'internet_users_pct']
+].mean().reset_index()
+
+yearly = master_viz.groupby('year').agg(
+    ecom_share_pct=('ecom_share_pct', 'mean'),
+    ecom_share_max=('ecom_share_pct', 'max'),
+    ecom_sales_usd_millions=('ecom_sales_usd_millions', 'sum'),
+    internet_users_pct=('internet_users_pct', 'mean')
+).reset_index()
+
+# Regions in order of first appearance (fixes trace order and colors)
+regions = master_viz['region'].dropna().unique()
 
 print("Creating interactive visualizations...")
 
 # 1. Global e-commerce trend with crisis markers
-yearly = master_viz.groupby('year').agg({
-    'ecom_share_pct': 'mean',
-    'ecom_sales_usd_millions': 'sum'
-}).reset_index()
+def write_global_trend():
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=yearly['year'],
+        y=yearly['ecom_share_pct'],
+        mode='lines+markers',
+        name='E-commerce Share',
+        line=dict(color='#1f77b4', width=3),
+        marker=dict(size=10),
+        hovertemplate='<b>Year:</b> %{x}<br><b>Share:</b> %{y:.2f}%<extra></extra>'
+    ))
 
-fig = go.Figure()
-fig.add_trace(go.Scatter(
-    x=yearly['year'],
-    y=yearly['ecom_share_pct'],
-    mode='lines+markers',
-    name='E-commerce Share',
-    line=dict(color='#1f77b4', width=3),
-    marker=dict(size=10),
-    hovertemplate='<b>Year:</b> %{x}<br><b>Share:</b> %{y:.2f}%<extra></extra>'
-))
-
-fig = add_crisis_markers(fig, yearly['ecom_share_pct'])
+    fig = add_crisis_markers(fig, yearly['ecom_share_pct'])
 
-fig.update_layout(
-    title='Global E-commerce Share Evolution (2012-2024)<br><sub>Red lines indicate major global crises</sub>',
-    xaxis_title='Year',
-    yaxis_title='E-commerce Share (%)',
-    hovermode='x unified',
-    template='plotly_white',
-    height=600,
-    font=dict(size=12)
-)
+    fig.update_layout(
+        title='Global E-commerce Share Evolution (2012-2024)<br><sub>Red lines indicate major global crises</sub>',
+        xaxis_title='Year',
+        yaxis_title='E-commerce Share (%)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12)
+    )
 
-fig.write_html(OUTPUTS / "Visualizations" / "global_ecommerce_trend.html")
-print("  ✓ global_ecommerce_trend.html (interactive)")
+    fig.write_html(OUTPUTS / "Visualizations" / "global_ecommerce_trend.html")
+    return "global_ecommerce_trend.html"
 
 # 2. Regional comparison with crisis markers
-fig = go.Figure()
-
-colors = px.colors.qualitative.Set2
-for i, region in enumerate(master_viz['region'].dropna().unique()):
-    data = master_viz[master_viz['region'] == region].groupby('year')['ecom_share_pct'].mean().reset_index()
-    fig.add_trace(go.Scatter(
-        x=data['year'],
-        y=data['ecom_share_pct'],
-        mode='lines+markers',
-        name=region,
-        line=dict(color=colors[i % len(colors)], width=2.5),
-        marker=dict(size=8),
-        hovertemplate=f'<b>{region}</b><br>Year: %{{x}}<br>Share: %{{y:.2f}}%<extra></extra>'
-    ))
+def write_regional_comparison():
+    # One trace per region straight from the region-year frame
+    fig = px.line(
+        agg,
+        x='year',
+        y='ecom_share_pct',
+        color='region',
+        markers=True,
+        category_orders={'region': list(regions)},
+        color_discrete_sequence=px.colors.qualitative.Set2,
+        template='plotly_white'
+    )
+    fig.update_traces(
+        line_width=2.5,
+        marker_size=8,
+        hovertemplate='<b>%{fullData.name}</b><br>Year: %{x}<br>Share: %{y:.2f}%<extra></extra>'
+    )
 
-fig = add_crisis_markers(fig, master_viz.groupby('year')['ecom_share_pct'].max())
+    fig = add_crisis_markers(fig, yearly['ecom_share_max'])
 
-fig.update_layout(
-    title='E-commerce Share by Region<br><sub>Hover to see details • Red lines mark global crises</sub>',
-    xaxis_title='Year',
-    yaxis_title='E-commerce Share (%)',
-    hovermode='x unified',
-    template='plotly_white',
-    height=700,
-    legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
-    font=dict(size=12)
-)
+    fig.update_layout(
+        title='E-commerce Share by Region<br><sub>Hover to see details • Red lines mark global crises</sub>',
+        xaxis_title='Year',
+        yaxis_title='E-commerce Share (%)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=700,
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01, title=None),
+        margin=None,  # undo px's tighter top margin; the two-line title needs the template's
+        font=dict(size=12)
+    )
 
-fig.write_html(OUTPUTS / "Visualizations" / "regional_comparison.html")
-print("  ✓ regional_comparison.html (interactive)")
+    fig.write_html(OUTPUTS / "Visualizations" / "regional_comparison.html")
+    return "regional_comparison.html"
 
 # 3. Internet vs E-commerce - Stacked Bar Chart by Year
-yearly_metrics = master.groupby('year').agg({
-    'internet_users_pct': 'mean',
-    'ecom_share_pct': 'mean'
-}).reset_index()
+def write_internet_vs_ecommerce():
+    fig = go.Figure()
 
-fig = go.Figure()
+    # Internet penetration (base)
+    fig.add_trace(go.Bar(
+        x=yearly['year'],
+        y=yearly['internet_users_pct'],
+        name='Internet Users (%)',
+        marker_color='#3498db',
+        hovertemplate='<b>Year:</b> %{x}<br><b>Internet Users:</b> %{y:.1f}%<extra></extra>'
+    ))
 
-# Internet penetration (base)
-fig.add_trace(go.Bar(
-    x=yearly_metrics['year'],
-    y=yearly_metrics['internet_users_pct'],
-    name='Internet Users (%)',
-    marker_color='#3498db',
-    hovertemplate='<b>Year:</b> %{x}<br><b>Internet Users:</b> %{y:.1f}%<extra></extra>'
-))
-
-# E-commerce share (overlay for comparison)
-fig.add_trace(go.Bar(
-    x=yearly_metrics['year'],
-    y=yearly_metrics['ecom_share_pct'],
-    name='E-commerce Share (%)',
-    marker_color='#e74c3c',
-    hovertemplate='<b>Year:</b> %{x}<br><b>E-commerce Share:</b> %{y:.1f}%<extra></extra>'
-))
-
-fig = add_crisis_markers(fig, yearly_metrics['internet_users_pct'])
+    # E-commerce share (overlay for comparison)
+    fig.add_trace(go.Bar(
+        x=yearly['year'],
+        y=yearly['ecom_share_pct'],
+        name='E-commerce Share (%)',
+        marker_color='#e74c3c',
+        hovertemplate='<b>Year:</b> %{x}<br><b>E-commerce Share:</b> %{y:.1f}%<extra></extra>'
+    ))
 
-fig.update_layout(
-    title='Internet Penetration vs E-commerce Adoption<br><sub>Comparison of digital infrastructure and e-commerce growth • Crisis markers shown</sub>',
-    xaxis_title='Year',
-    yaxis_title='Percentage (%)',
-    barmode='group',  # Side-by-side bars
-    hovermode='x unified',
-    template='plotly_white',
-    height=600,
-    font=dict(size=12),
-    legend=dict(yanchor="top", y=0.99, xanchor="right", x=0.99)
-)
+    fig = add_crisis_markers(fig, yearly['internet_users_pct'])
+
+    fig.update_layout(
+        title='Internet Penetration vs E-commerce Adoption<br><sub>Comparison of digital infrastructure and e-commerce growth • Crisis markers shown</sub>',
+        xaxis_title='Year',
+        yaxis_title='Percentage (%)',
+        barmode='group',  # Side-by-side bars
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12),
+        legend=dict(yanchor="top", y=0.99, xanchor="right", x=0.99)
+    )
 
-fig.write_html(OUTPUTS / "Visualizations" / "internet_vs_ecommerce.html")
-print("  ✓ internet_vs_ecommerce.html (interactive)")
+    fig.write_html(OUTPUTS / "Visualizations" / "internet_vs_ecommerce.html")
+    return "internet_vs_ecommerce.html"
 
 # 4. COVID impact with crisis markers
-pre_covid = master_viz[master_viz['year'] < 2020][['year', 'ecom_share_pct']].copy()
-pre_covid['period'] = 'Pre-COVID (2012-2019)'
+def write_covid_impact():
+    # Tag each row with its period in one vectorized pass instead of three copies + concat
+    period_labels = ['Pre-COVID (2012-2019)', 'COVID Era (2020-2022)', 'Post-COVID (2023+)']
+    period = np.select(
+        [master_viz['year'] < 2020, master_viz['year'] <= 2022, master_viz['year'] > 2022],
+        period_labels,
+        default=None
+    )
+    all_periods = master_viz.assign(
+        period=pd.Categorical(period, categories=period_labels)
+    ).dropna(subset=['period'])
+
+    fig = px.box(
+        all_periods,
+        x='period',
+        y='ecom_share_pct',
+        color='period',
+        title='E-commerce Share Distribution: Pre-COVID vs COVID vs Post-COVID',
+        labels={'ecom_share_pct': 'E-commerce Share (%)', 'period': 'Period'},
+        category_orders={'period': period_labels},
+        color_discrete_sequence=['#1f77b4', '#ff7f0e', '#2ca02c'],
+        template='plotly_white',
+        height=600
+    )
 
-covid = master_viz[(master_viz['year'] >= 2020) & (master_viz['year'] <= 2022)][['year', 'ecom_share_pct']].copy()
-covid['period'] = 'COVID Era (2020-2022)'
+    fig.update_layout(showlegend=False, font=dict(size=12))
 
-post_covid = master_viz[master_viz['year'] > 2022][['year', 'ecom_share_pct']].copy()
-post_covid['period'] = 'Post-COVID (2023+)'
+    fig.write_html(OUTPUTS / "Visualizations" / "covid_impact.html")
+    return "covid_impact.html"
 
-all_periods = pd.concat([pre_covid, covid, post_covid])
+# Charts are independent and write_html is mostly serialization + file I/O,
+# so build and write them concurrently (results come back in order)
+global_charts = [write_global_trend, write_regional_comparison,
+                 write_internet_vs_ecommerce, write_covid_impact]
+with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+    for name in ex.map(lambda write: write(), global_charts):
+        print(f"  ✓ {name} (interactive)")
 
-fig = px.box(
-    all_periods,
-    x='period',
-    y='ecom_share_pct',
-    color='period',
-    title='E-commerce Share Distribution: Pre-COVID vs COVID vs Post-COVID',
-    labels={'ecom_share_pct': 'E-commerce Share (%)', 'period': 'Period'},
-    color_discrete_sequence=['#1f77b4', '#ff7f0e', '#2ca02c'],
+# 5. Regional detailed view (separate chart for each region)
+print("\nCreating regional detailed visualizations...")
+
+# Layout shared by every regional detail chart (dual y-axes)
+BASE_LAYOUT = dict(
+    yaxis2=dict(
+        title='Internet Users (%)',
+        overlaying='y',
+        side='right'
+    ),
+    hovermode='x unified',
     template='plotly_white',
-    height=600
+    height=600,
+    font=dict(size=12),
+    legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01)
 )
 
-fig.update_layout(showlegend=False, font=dict(size=12))
-
-fig.write_html(OUTPUTS / "Visualizations" / "covid_impact.html")
-print("  ✓ covid_impact.html (interactive)")
-
-# 5. Regional detailed view (separate chart for each region)
-print("\nCreating regional detailed visualizations...")
-for region in master_viz['region'].dropna().unique():
-    region_data = master_viz[master_viz['region'] == region]
+def build_and_write(region):
+    yearly_reg = agg[agg['region'] == region]
     
     fig = go.Figure()
     
     # E-commerce share trend
-    yearly_reg = region_data.groupby('year')['ecom_share_pct'].mean().reset_index()
-    
     fig.add_trace(go.Scatter(
         x=yearly_reg['year'],
         y=yearly_reg['ecom_share_pct'],
@@ -530,11 +693,9 @@ for region in master_viz['region'].dropna().unique():
     ))
     
     # Add internet penetration on secondary axis
-    yearly_internet = region_data.groupby('year')['internet_users_pct'].mean().reset_index()
-    
     fig.add_trace(go.Scatter(
-        x=yearly_internet['year'],
-        y=yearly_internet['internet_users_pct'],
+        x=yearly_reg['year'],
+        y=yearly_reg['internet_users_pct'],
         mode='lines+markers',
         name='Internet Penetration',
         line=dict(color='#2ca02c', width=3, dash='dot'),
@@ -549,23 +710,19 @@ for region in master_viz['region'].dropna().unique():
     # Update layout with dual y-axes
     safe_name = region.replace(' ', '_').replace(',', '').replace('&', 'and')
     fig.update_layout(
+        **BASE_LAYOUT,
         title=f'{region}: E-commerce & Internet Trends<br><sub>Red lines mark global crises</sub>',
         xaxis_title='Year',
-        yaxis_title='E-commerce Share (%)',
-        yaxis2=dict(
-            title='Internet Users (%)',
-            overlaying='y',
-            side='right'
-        ),
-        hovermode='x unified',
-        template='plotly_white',
-        height=600,
-        font=dict(size=12),
-        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01)
+        yaxis_title='E-commerce Share (%)'
     )
     
-    fig.write_html(OUTPUTS / "Visualizations" / f"regional_detail_{safe_name}.html")
-    print(f"  ✓ regional_detail_{safe_name}.html")
+    filename = f"regional_detail_{safe_name}.html"
+    fig.write_html(OUTPUTS / "Visualizations" / filename)
+    return filename
+
+with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+    for name in ex.map(build_and_write, regions):
+        print(f"  ✓ {name}")
 
 print()
 
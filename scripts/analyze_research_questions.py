@@ -3,14 +3,39 @@ Deep Analysis for Three Research Questions
 Analyzes e-commerce resilience during global shocks
 """
 
+import csv
 import pandas as pd
 import numpy as np
 from scipy import stats
 import matplotlib.pyplot as plt
 import seaborn as sns
-
-# Load data
-df = pd.read_csv('outputs/data/master_panel.csv')
+from pathlib import Path
+
+# Optional JIT: compiled per-country kernel for the Q3 conflict flag
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def high_conflict_flags(codes, deaths, n_countries, threshold):
+        """Sum deaths per country code in one pass and flag totals above threshold"""
+        totals = np.zeros(n_countries)
+        for i in range(codes.size):
+            if codes[i] >= 0 and not np.isnan(deaths[i]):
+                totals[codes[i]] += deaths[i]
+        return totals > threshold
+
+# Load data (the Parquet copy preserves dtypes; only use it if it is not older than the CSV)
+MASTER_PANEL = Path('outputs/data/master_panel.csv')
+MASTER_PARQUET = MASTER_PANEL.with_suffix('.parquet')
+if (MASTER_PARQUET.exists()
+        and MASTER_PARQUET.stat().st_mtime >= MASTER_PANEL.stat().st_mtime):
+    df = pd.read_parquet(MASTER_PARQUET)
+else:
+    df = pd.read_csv(MASTER_PANEL)
 
 print("="*80)
 print("RESEARCH QUESTION ANALYSIS")
@@ -97,42 +122,26 @@ print("QUESTION 2: Structural Characteristics and E-commerce Resilience")
 print("="*80)
 print()
 
-# Focus on COVID shock period
-covid_data = df[(df['year'] >= 2020) & (df['year'] <= 2022)].copy()
+# Pre-COVID baseline (2017-2019) and COVID shock period (2020-2022)
+pre_mask = df['year'].between(2017, 2019)
+covid_mask = df['year'].between(2020, 2022)
 
-# Calculate resilience metrics for each country
-resilience_metrics = []
+# Calculate resilience metrics for all countries in one groupby per period
+# (only countries observed in both periods are kept)
+baseline = df.loc[pre_mask].groupby('country_name', observed=True)['ecom_share_pct'].mean().rename('baseline_share')
+covid_share = df.loc[covid_mask].groupby('country_name', observed=True)['ecom_share_pct'].mean().rename('covid_share')
+resilience_df = pd.concat([baseline, covid_share], axis=1, join='inner')
+resilience_df['change'] = resilience_df['covid_share'] - resilience_df['baseline_share']
 
-for country in covid_data['country_name'].unique():
-    country_data = df[df['country_name'] == country].sort_values('year')
-    
-    # Pre-COVID baseline
-    pre_covid = country_data[(country_data['year'] >= 2017) & (country_data['year'] < 2020)]
-    covid_period = country_data[(country_data['year'] >= 2020) & (country_data['year'] <= 2022)]
-    
-    if len(pre_covid) > 0 and len(covid_period) > 0:
-        # Metrics
-        baseline_share = pre_covid['ecom_share_pct'].mean()
-        covid_share = covid_period['ecom_share_pct'].mean()
-        change = covid_share - baseline_share
-        
-        # Structural characteristics (average)
-        internet_penetration = country_data['internet_users_pct'].mean()
-        income_group = country_data['income_group'].iloc[0]
-        region = country_data['region'].iloc[0]
-        
-        resilience_metrics.append({
-            'country': country,
-            'baseline_share': baseline_share,
-            'covid_share': covid_share,
-            'change': change,
-            'internet_penetration': internet_penetration,
-            'income_group': income_group,
-            'region': region,
-            'is_high_income': 1 if income_group == 'High income' else 0
-        })
-
-resilience_df = pd.DataFrame(resilience_metrics)
+# Structural characteristics (average)
+internet = df.groupby('country_name', observed=True)['internet_users_pct'].mean().rename('internet_penetration')
+structure = df.groupby('country_name', observed=True)[['income_group', 'region']].first()
+
+resilience_df = (
+    resilience_df.join(internet).join(structure)
+    .rename_axis('country').reset_index()
+)
+resilience_df['is_high_income'] = (resilience_df['income_group'] == 'High income').astype('int8')
 
 print(f"Countries analyzed: {len(resilience_df)}")
 print()
@@ -144,7 +153,7 @@ print(f"Internet Penetration vs COVID Change: r = {correlation_internet:.3f}")
 
 # Group by income level
 print("\n--- E-commerce Change by Income Level ---")
-income_analysis = resilience_df.groupby('income_group')['change'].agg(['mean', 'count'])
+income_analysis = resilience_df.groupby('income_group', observed=True)['change'].agg(['mean', 'count'])
 print(income_analysis)
 
 # Statistical test: High income vs others
@@ -170,53 +179,72 @@ print("QUESTION 3: Conflict Intensity and E-commerce Dynamics")
 print("="*80)
 print()
 
-# Calculate conflict intensity for each country
-conflict_intensity = df.groupby('country_name')['conflict_deaths'].sum().reset_index()
-conflict_intensity.columns = ['country_name', 'total_conflict_deaths']
-
-# Classify as high conflict if > 0 deaths
-conflict_intensity['high_conflict'] = (conflict_intensity['total_conflict_deaths'] > 100).astype(int)
+# Calculate conflict intensity for each country and classify as high conflict if > 100 deaths
+if HAS_NUMBA:
+    codes, countries = pd.factorize(df['country_name'], sort=False)
+    deaths = df['conflict_deaths'].to_numpy(dtype=np.float64)
+    flag = pd.Series(high_conflict_flags(codes, deaths, len(countries), 100.0), index=countries)
+    flag = flag.astype('int8')
+    # Rows with a missing country have code -1; flag them 0 like the fallback below
+    row_flag = np.where(codes >= 0, flag.to_numpy()[codes], 0).astype('int8')
+else:
+    deaths = df.groupby('country_name', observed=True, sort=False)['conflict_deaths'].sum()
+    flag = (deaths > 100).astype('int8')
+    row_flag = df['country_name'].map(flag).fillna(0).astype('int8')
 
-print(f"High conflict countries (>100 deaths): {conflict_intensity['high_conflict'].sum()}")
-print(f"Low/no conflict countries: {len(conflict_intensity) - conflict_intensity['high_conflict'].sum()}")
+print(f"High conflict countries (>100 deaths): {flag.sum()}")
+print(f"Low/no conflict countries: {len(flag) - flag.sum()}")
 print()
 
-# Merge with main data
-df_conflict = df.merge(conflict_intensity, on='country_name')
+# Attach the per-country flag to every row
+df_conflict = df.assign(high_conflict=row_flag)
 
 # Analysis during COVID
-covid_conflict = df_conflict[(df_conflict['year'] >= 2020) & (df_conflict['year'] <= 2022)]
+covid_conflict = df_conflict[df_conflict['year'].between(2020, 2022)]
+
+# Pull the COVID-era columns out once and split them by the flag with boolean masks
+is_high = covid_conflict['high_conflict'].to_numpy(dtype=bool)
+share_vals = covid_conflict['ecom_share_pct'].to_numpy(dtype=np.float64)
+growth_vals = covid_conflict['ecom_sales_growth'].to_numpy(dtype=np.float64)
+high_conf_data = share_vals[is_high & ~np.isnan(share_vals)]
+low_conf_data = share_vals[~is_high & ~np.isnan(share_vals)]
+high_growth_data = growth_vals[is_high & ~np.isnan(growth_vals)]
+low_growth_data = growth_vals[~is_high & ~np.isnan(growth_vals)]
+
+def group_mean(values):
+    """Mean of a NaN-free array, NaN when the group is empty"""
+    return values.mean() if values.size else np.nan
 
 print("--- E-commerce Share by Conflict Level during COVID ---")
-high_conflict_covid = covid_conflict[covid_conflict['high_conflict'] == 1]['ecom_share_pct'].mean()
-low_conflict_covid = covid_conflict[covid_conflict['high_conflict'] == 0]['ecom_share_pct'].mean()
+high_conflict_covid = group_mean(high_conf_data)
+low_conflict_covid = group_mean(low_conf_data)
 
 print(f"High conflict countries: {high_conflict_covid:.2f}%")
 print(f"Low/no conflict countries: {low_conflict_covid:.2f}%")
 print(f"Difference: {high_conflict_covid - low_conflict_covid:.2f} pp")
 
 # Growth comparison
-high_conflict_growth = covid_conflict[covid_conflict['high_conflict'] == 1]['ecom_sales_growth'].mean()
-low_conflict_growth = covid_conflict[covid_conflict['high_conflict'] == 0]['ecom_sales_growth'].mean()
+high_conflict_growth = group_mean(high_growth_data)
+low_conflict_growth = group_mean(low_growth_data)
 
 print(f"\n--- E-commerce Growth during COVID ---")
 print(f"High conflict countries: {high_conflict_growth:.2f}%")
 print(f"Low/no conflict countries: {low_conflict_growth:.2f}%")
 
 # Statistical test
-high_conf_data = covid_conflict[covid_conflict['high_conflict'] == 1]['ecom_share_pct'].dropna()
-low_conf_data = covid_conflict[covid_conflict['high_conflict'] == 0]['ecom_share_pct'].dropna()
-
 if len(high_conf_data) > 0 and len(low_conf_data) > 0:
     t_stat, p_value = stats.ttest_ind(high_conf_data, low_conf_data)
     print(f"\nT-test: t-statistic = {t_stat:.3f}, p-value = {p_value:.4f}")
 
-# Save Q3 results
-conflict_summary = pd.DataFrame([
-    {'Conflict_Level': 'High Conflict', 'Avg_Share': high_conflict_covid, 'Avg_Growth': high_conflict_growth},
-    {'Conflict_Level': 'Low/No Conflict', 'Avg_Share': low_conflict_covid, 'Avg_Growth': low_conflict_growth}
-])
-conflict_summary.to_csv('outputs/data/q3_conflict_analysis.csv', index=False)
+# Save Q3 results (two rows, written directly; missing groups stay empty like to_csv)
+with open('outputs/data/q3_conflict_analysis.csv', 'w', newline='') as f:
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(['Conflict_Level', 'Avg_Share', 'Avg_Growth'])
+    for level, share, growth in [
+        ('High Conflict', high_conflict_covid, high_conflict_growth),
+        ('Low/No Conflict', low_conflict_covid, low_conflict_growth)
+    ]:
+        writer.writerow([level] + ['' if pd.isna(v) else v for v in (share, growth)])
 print("\n✓ Saved: outputs/data/q3_conflict_analysis.csv")
 
 # ============================================================================
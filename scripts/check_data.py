@@ -1,38 +1,45 @@
 """
 Check what happened with data - regional coverage
 """
-import pandas as pd
 from pathlib import Path
 
+from data_io import load_data
+
+DATA = Path("outputs") / "data" / "analysis_ready.csv"
+
 print("="*80)
 print("DATA COVERAGE CHECK")
 print("="*80)
 print()
 
 # Load both datasets
-original = pd.read_csv("outputs/data/analysis_ready.csv")
+original = load_data(DATA)
+
+# Encode the repeated labels once so filters and groupbys work on integer codes
+original = original.astype({'region': 'category', 'country_name': 'category'})
 print(f"Current cleaned data: {len(original)} rows")
 print()
 
+# One groupby feeds both the coverage table and the per-region samples
+summary = original.groupby('region', sort=False, observed=True).agg(
+    Countries=('country_name', 'nunique'),
+    year_min=('year', 'min'),
+    year_max=('year', 'max'),
+    Observations=('ecom_share_pct', 'count'),
+    rows=('year', 'size'),
+    country_list=('country_name', 'unique')
+)
+summary['Year Range'] = summary['year_min'].astype(str) + '-' + summary['year_max'].astype(str)
+
 # Check regional distribution
 print("Regional coverage:")
-regional = original.groupby('region').agg({
-    'country_name': 'nunique',
-    'year': lambda x: f"{x.min()}-{x.max()}",
-    'ecom_share_pct': 'count'
-}).rename(columns={
-    'country_name': 'Countries',
-    'year': 'Year Range',
-    'ecom_share_pct': 'Observations'
-})
-print(regional)
+print(summary[['Countries', 'Year Range', 'Observations']])
 print()
 
 # Check what data looks like
 print("Sample data by region:")
-for region in original['region'].dropna().unique():
-    reg_data = original[original['region'] == region]
+for region, row in summary.iterrows():
     print(f"\n{region}:")
-    print(f"  Observations: {len(reg_data)}")
-    print(f"  Countries: {reg_data['country_name'].unique()}")
-    print(f"  Years: {reg_data['year'].min()}-{reg_data['year'].max()}")
+    print(f"  Observations: {row['rows']}")
+    print(f"  Countries: {row['country_list'].tolist()}")
+    print(f"  Years: {row['Year Range']}")
@@ -0,0 +1,28 @@
+"""
+Shared data loading for the helper scripts
+Caches analysis_ready.csv as Parquet when pyarrow is available
+"""
+
+import pandas as pd
+
+# Optional fast IO: cache the CSV as Parquet when pyarrow is available
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+def load_data(csv_path):
+    """Load the analysis-ready panel, via a Parquet copy cached next to the CSV"""
+    cache_path = csv_path.with_suffix('.parquet')
+    if (HAS_PYARROW and cache_path.exists()
+            and cache_path.stat().st_mtime >= csv_path.stat().st_mtime):
+        return pd.read_parquet(cache_path)
+
+    data = pd.read_csv(csv_path)
+    if HAS_PYARROW:
+        try:
+            data.to_parquet(cache_path, compression='snappy', index=False)
+        except Exception as e:
+            print(f"  ⚠ Could not write cache {cache_path.name}: {e}")
+    return data
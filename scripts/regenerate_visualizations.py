@@ -4,34 +4,24 @@ Loads existing data and regenerates all interactive charts
 Run this after making visualization changes
 """
 
+import os
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
+from plotly.subplots import make_subplots
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
-print("="*80)
-print("REGENERATING VISUALIZATIONS")
-print("="*80)
-print()
+from data_io import load_data
 
 # Paths
 BASE = Path(".")
 DATA = BASE / "outputs" / "data" / "analysis_ready.csv"
 OUTPUTS = BASE / "outputs" / "Visualizations"
 
-# Load data
-print("Loading data...")
-master = pd.read_csv(DATA)
-
-# Remove Latin America & Caribbean (insufficient data)
-master = master[master['region'] != 'Latin America & Caribbean'].copy()
-
-# Filter data from 2012 onwards (earlier years are mostly empty)
-master = master[master['year'] >= 2012].copy()
-
-print(f"✓ Loaded: {len(master)} observations")
-print(f"  Regions: {master['region'].nunique()}")
-print()
+# Load plotly.js from the CDN instead of embedding the ~3 MB bundle in every file
+HTML_OPTS = dict(include_plotlyjs='cdn', full_html=True, auto_play=False)
 
 # Crisis events
 CRISIS_EVENTS = {
@@ -53,151 +43,9 @@ def add_crisis_markers(fig, y_range):
         )
     return fig
 
-print("Creating interactive visualizations...")
-
-# 1. Global trend
-yearly = master.groupby('year').agg({
-    'ecom_share_pct': 'mean',
-    'ecom_sales_usd_millions': 'sum'
-}).reset_index()
-
-fig = go.Figure()
-fig.add_trace(go.Scatter(
-    x=yearly['year'],
-    y=yearly['ecom_share_pct'],
-    mode='lines+markers',
-    name='E-commerce Share',
-    line=dict(color='#1f77b4', width=3),
-    marker=dict(size=10),
-    hovertemplate='<b>Year:</b> %{x}<br><b>Share:</b> %{y:.2f}%<extra></extra>'
-))
-
-fig = add_crisis_markers(fig, yearly['ecom_share_pct'])
-
-fig.update_layout(
-    title='Global E-commerce Share Evolution (2012-2024)<br><sub>Red lines indicate major global crises</sub>',
-    xaxis_title='Year',
-    xaxis=dict(range=[2011.5, 2024.5]),  # Limit X-axis to 2012-2024
-    yaxis_title='E-commerce Share (%)',
-    hovermode='x unified',
-    template='plotly_white',
-    height=600,
-    font=dict(size=12)
-)
-
-fig.write_html(OUTPUTS / "global_ecommerce_trend.html")
-print("  ✓ global_ecommerce_trend.html")
-
-# 2. Regional comparison
-fig = go.Figure()
-
-colors = px.colors.qualitative.Set2
-for i, region in enumerate(master['region'].dropna().unique()):
-    data = master[master['region'] == region].groupby('year')['ecom_share_pct'].mean().reset_index()
-    fig.add_trace(go.Scatter(
-        x=data['year'],
-        y=data['ecom_share_pct'],
-        mode='lines+markers',
-        name=region,
-        line=dict(color=colors[i % len(colors)], width=2.5),
-        marker=dict(size=8),
-        hovertemplate=f'<b>{region}</b><br>Year: %{{x}}<br>Share: %{{y:.2f}}%<extra></extra>'
-    ))
-
-fig = add_crisis_markers(fig, master.groupby('year')['ecom_share_pct'].max())
-
-fig.update_layout(
-    title='E-commerce Share by Region<br><sub>Hover to see details • Red lines mark global crises</sub>',
-    xaxis_title='Year',
-    xaxis=dict(range=[2011.5, 2024.5]),
-    yaxis_title='E-commerce Share (%)',
-    hovermode='x unified',
-    template='plotly_white',
-    height=700,
-    legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
-    font=dict(size=12)
-)
-
-fig.write_html(OUTPUTS / "regional_comparison.html")
-print("  ✓ regional_comparison.html")
-
-# 3. Internet vs E-commerce - Grouped Bars
-yearly_metrics = master.groupby('year').agg({
-    'internet_users_pct': 'mean',
-    'ecom_share_pct': 'mean'
-}).reset_index()
-
-fig = go.Figure()
-
-fig.add_trace(go.Bar(
-    x=yearly_metrics['year'],
-    y=yearly_metrics['internet_users_pct'],
-    name='Internet Users (%)',
-    marker_color='#3498db',
-    hovertemplate='<b>Year:</b> %{x}<br><b>Internet Users:</b> %{y:.1f}%<extra></extra>'
-))
-
-fig.add_trace(go.Bar(
-    x=yearly_metrics['year'],
-    y=yearly_metrics['ecom_share_pct'],
-    name='E-commerce Share (%)',
-    marker_color='#e74c3c',
-    hovertemplate='<b>Year:</b> %{x}<br><b>E-commerce Share:</b> %{y:.1f}%<extra></extra>'
-))
-
-fig = add_crisis_markers(fig, yearly_metrics['internet_users_pct'])
-
-fig.update_layout(
-    title='Internet Penetration vs E-commerce Adoption<br><sub>Comparison of digital infrastructure and e-commerce growth • Crisis markers shown</sub>',
-    xaxis_title='Year',
-    yaxis_title='Percentage (%)',
-    barmode='group',
-    hovermode='x unified',
-    template='plotly_white',
-    height=600,
-    font=dict(size=12),
-    legend=dict(yanchor="top", y=0.99, xanchor="right", x=0.99)
-)
-
-fig.write_html(OUTPUTS / "internet_vs_ecommerce.html")
-print("  ✓ internet_vs_ecommerce.html")
-
-# 4. COVID impact
-pre_covid = master[master['year'] < 2020][['year', 'ecom_share_pct']].copy()
-pre_covid['period'] = 'Pre-COVID (2012-2019)'
-
-covid = master[(master['year'] >= 2020) & (master['year'] <= 2022)][['year', 'ecom_share_pct']].copy()
-covid['period'] = 'COVID Era (2020-2022)'
-
-post_covid = master[master['year'] > 2022][['year', 'ecom_share_pct']].copy()
-post_covid['period'] = 'Post-COVID (2023+)'
-
-all_periods = pd.concat([pre_covid, covid, post_covid])
-
-fig = px.box(
-    all_periods,
-    x='period',
-    y='ecom_share_pct',
-    color='period',
-    title='E-commerce Share Distribution: Pre-COVID vs COVID vs Post-COVID',
-    labels={'ecom_share_pct': 'E-commerce Share (%)', 'period': 'Period'},
-    color_discrete_sequence=['#1f77b4', '#ff7f0e', '#2ca02c'],
-    template='plotly_white',
-    height=600
-)
-
-fig.update_layout(showlegend=False, font=dict(size=12))
-
-fig.write_html(OUTPUTS / "covid_impact.html")
-print("  ✓ covid_impact.html")
-
-# 5. Regional detailed charts - 2 panels for clarity
-print("\nRegional detailed charts...")
-for region in master['region'].dropna().unique():
-    region_data = master[master['region'] == region]
-    
+def build_region(region, region_yearly):
+    """Build the two-panel detail chart for one region and render it to HTML"""
     # Create subplots - 2 rows, shared x-axis
-    from plotly.subplots import make_subplots
     fig = make_subplots(
         rows=2, cols=1,
         shared_xaxes=True,
@@ -206,33 +54,33 @@ for region in master['region'].dropna().unique():
         row_heights=[0.5, 0.5]
     )
     
-    # Panel 1: E-commerce share
-    yearly_ecom = region_data.groupby('year')['ecom_share_pct'].mean().reset_index()
+    years = region_yearly.index.to_numpy()
     
-    fig.add_trace(go.Scatter(
-        x=yearly_ecom['year'],
-        y=yearly_ecom['ecom_share_pct'],
-        mode='lines+markers',
-        name='E-commerce Share',
-        line=dict(color='#e74c3c', width=3),
-        marker=dict(size=10),
-        hovertemplate='<b>Year:</b> %{x}<br><b>E-commerce:</b> %{y:.2f}%<extra></extra>',
-        showlegend=True
-    ), row=1, col=1)
-    
-    # Panel 2: Internet penetration
-    yearly_internet = region_data.groupby('year')['internet_users_pct'].mean().reset_index()
-    
-    fig.add_trace(go.Scatter(
-        x=yearly_internet['year'],
-        y=yearly_internet['internet_users_pct'],
-        mode='lines+markers',
-        name='Internet Users',
-        line=dict(color='#3498db', width=3),
-        marker=dict(size=10),
-        hovertemplate='<b>Year:</b> %{x}<br><b>Internet:</b> %{y:.2f}%<extra></extra>',
-        showlegend=True
-    ), row=2, col=1)
+    # Both panels are added in one call: e-commerce share on top, internet below
+    fig.add_traces([
+        # Panel 1: E-commerce share
+        go.Scatter(
+            x=years,
+            y=region_yearly['ecom_share_pct'].to_numpy(),
+            mode='lines+markers',
+            name='E-commerce Share',
+            line=dict(color='#e74c3c', width=3),
+            marker=dict(size=10),
+            hovertemplate='<b>Year:</b> %{x}<br><b>E-commerce:</b> %{y:.2f}%<extra></extra>',
+            showlegend=True
+        ),
+        # Panel 2: Internet penetration
+        go.Scatter(
+            x=years,
+            y=region_yearly['internet_users_pct'].to_numpy(),
+            mode='lines+markers',
+            name='Internet Users',
+            line=dict(color='#3498db', width=3),
+            marker=dict(size=10),
+            hovertemplate='<b>Year:</b> %{x}<br><b>Internet:</b> %{y:.2f}%<extra></extra>',
+            showlegend=True
+        )
+    ], rows=[1, 2], cols=[1, 1])
     
     # Add crisis markers to both panels
     for year, event in CRISIS_EVENTS.items():
@@ -271,16 +119,200 @@ for region in master['region'].dropna().unique():
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
     )
     
-    fig.write_html(OUTPUTS / f"regional_detail_{safe_name}.html")
-    print(f"  ✓ regional_detail_{safe_name}.html")
-
-print()
-print("="*80)
-print("✓ VISUALIZATIONS REGENERATED")
-print("="*80)
-print()
-print(f"Location: {OUTPUTS}/")
-print("Open .html files in browser to view")
-print()
+    filename = f"regional_detail_{safe_name}.html"
+    return filename, fig.to_html(**HTML_OPTS, validate=False)
+
+
+if __name__ == '__main__':
+    print("="*80)
+    print("REGENERATING VISUALIZATIONS")
+    print("="*80)
+    print()
+
+    # Load data
+    print("Loading data...")
+    master = load_data(DATA)
+
+    # Encode the repeated labels once so filters and groupbys work on integer codes
+    master = master.astype({'region': 'category', 'country_name': 'category'})
+
+    # Remove Latin America & Caribbean (insufficient data)
+    master = master[master['region'] != 'Latin America & Caribbean'].copy()
+
+    # Filter data from 2012 onwards (earlier years are mostly empty)
+    master = master[master['year'] >= 2012].copy()
+
+    print(f"✓ Loaded: {len(master)} observations")
+    print(f"  Regions: {master['region'].nunique()}")
+    print()
+
+    print("Creating interactive visualizations...")
+
+    # Global yearly metrics, computed once and shared by the overview charts
+    # (hash-grouped, then sorted by year for the x-axis)
+    yearly_all = master.groupby('year', sort=False, observed=True).agg(
+        ecom_share_pct=('ecom_share_pct', 'mean'),
+        ecom_share_max=('ecom_share_pct', 'max'),
+        ecom_sales_usd_millions=('ecom_sales_usd_millions', 'sum'),
+        internet_users_pct=('internet_users_pct', 'mean')
+    ).sort_index().reset_index()
+
+    # 1. Global trend
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=yearly_all['year'],
+        y=yearly_all['ecom_share_pct'],
+        mode='lines+markers',
+        name='E-commerce Share',
+        line=dict(color='#1f77b4', width=3),
+        marker=dict(size=10),
+        hovertemplate='<b>Year:</b> %{x}<br><b>Share:</b> %{y:.2f}%<extra></extra>'
+    ))
+
+    fig = add_crisis_markers(fig, yearly_all['ecom_share_pct'])
+
+    fig.update_layout(
+        title='Global E-commerce Share Evolution (2012-2024)<br><sub>Red lines indicate major global crises</sub>',
+        xaxis_title='Year',
+        xaxis=dict(range=[2011.5, 2024.5]),  # Limit X-axis to 2012-2024
+        yaxis_title='E-commerce Share (%)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12)
+    )
+
+    fig.write_html(OUTPUTS / "global_ecommerce_trend.html", **HTML_OPTS)
+    print("  ✓ global_ecommerce_trend.html")
+
+    # 2. Regional comparison
+    colors = px.colors.qualitative.Set2
+    region_list = master['region'].dropna().unique()
+    palette = [colors[i % len(colors)] for i in range(len(region_list))]
+    traces = []
+    for region, color in zip(region_list, palette):
+        data = master[master['region'] == region].groupby('year', sort=False, observed=True)[
+            'ecom_share_pct'
+        ].mean().sort_index()
+        traces.append(go.Scatter(
+            x=data.index.to_numpy(),
+            y=data.to_numpy(),
+            mode='lines+markers',
+            name=region,
+            line=dict(color=color, width=2.5),
+            marker=dict(size=8),
+            hovertemplate=f'<b>{region}</b><br>Year: %{{x}}<br>Share: %{{y:.2f}}%<extra></extra>'
+        ))
+
+    # Hand all region traces to the figure at once
+    fig = go.Figure(data=traces)
+
+    fig = add_crisis_markers(fig, yearly_all['ecom_share_max'])
+
+    fig.update_layout(
+        title='E-commerce Share by Region<br><sub>Hover to see details • Red lines mark global crises</sub>',
+        xaxis_title='Year',
+        xaxis=dict(range=[2011.5, 2024.5]),
+        yaxis_title='E-commerce Share (%)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=700,
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
+        font=dict(size=12)
+    )
+
+    fig.write_html(OUTPUTS / "regional_comparison.html", **HTML_OPTS)
+    print("  ✓ regional_comparison.html")
+
+    # 3. Internet vs E-commerce - Grouped Bars
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=yearly_all['year'],
+        y=yearly_all['internet_users_pct'],
+        name='Internet Users (%)',
+        marker_color='#3498db',
+        hovertemplate='<b>Year:</b> %{x}<br><b>Internet Users:</b> %{y:.1f}%<extra></extra>'
+    ))
+
+    fig.add_trace(go.Bar(
+        x=yearly_all['year'],
+        y=yearly_all['ecom_share_pct'],
+        name='E-commerce Share (%)',
+        marker_color='#e74c3c',
+        hovertemplate='<b>Year:</b> %{x}<br><b>E-commerce Share:</b> %{y:.1f}%<extra></extra>'
+    ))
+
+    fig = add_crisis_markers(fig, yearly_all['internet_users_pct'])
+
+    fig.update_layout(
+        title='Internet Penetration vs E-commerce Adoption<br><sub>Comparison of digital infrastructure and e-commerce growth • Crisis markers shown</sub>',
+        xaxis_title='Year',
+        yaxis_title='Percentage (%)',
+        barmode='group',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12),
+        legend=dict(yanchor="top", y=0.99, xanchor="right", x=0.99)
+    )
+
+    fig.write_html(OUTPUTS / "internet_vs_ecommerce.html", **HTML_OPTS)
+    print("  ✓ internet_vs_ecommerce.html")
+
+    # 4. COVID impact
+    # Tag each row with its period in one vectorized pass instead of three copies + concat
+    period_labels = ['Pre-COVID (2012-2019)', 'COVID Era (2020-2022)', 'Post-COVID (2023+)']
+    period = np.select(
+        [master['year'] < 2020, master['year'] <= 2022, master['year'] > 2022],
+        period_labels,
+        default=None
+    )
+    all_periods = master.assign(
+        period=pd.Categorical(period, categories=period_labels)
+    ).dropna(subset=['period'])
+
+    fig = px.box(
+        all_periods,
+        x='period',
+        y='ecom_share_pct',
+        color='period',
+        title='E-commerce Share Distribution: Pre-COVID vs COVID vs Post-COVID',
+        labels={'ecom_share_pct': 'E-commerce Share (%)', 'period': 'Period'},
+        category_orders={'period': period_labels},
+        color_discrete_sequence=['#1f77b4', '#ff7f0e', '#2ca02c'],
+        template='plotly_white',
+        height=600
+    )
 
+    fig.update_layout(showlegend=False, font=dict(size=12))
+
+    fig.write_html(OUTPUTS / "covid_impact.html", **HTML_OPTS)
+    print("  ✓ covid_impact.html")
+
+    # 5. Regional detailed charts - 2 panels for clarity
+    print("\nRegional detailed charts...")
+    regions = master['region'].dropna().unique()
+    # Both panel metrics for every (region, year) in a single groupby
+    panel = master.groupby(['region', 'year'], sort=False, observed=True)[
+        ['ecom_share_pct', 'internet_users_pct']
+    ].mean().sort_index()
+    # One process per region; each worker only receives its own yearly rows
+    slices = [panel.loc[region] for region in regions]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        pages = list(ex.map(build_region, regions, slices))
+    for filename, html in pages:
+        (OUTPUTS / filename).write_text(html, encoding='utf-8')
+        print(f"  ✓ {filename}")
+
+    print()
+    print("="*80)
+    print("✓ VISUALIZATIONS REGENERATED")
+    print("="*80)
+    print()
+    print(f"Location: {OUTPUTS}/")
+    print("Open .html files in browser to view")
+    print()
 
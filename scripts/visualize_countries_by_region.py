@@ -3,36 +3,24 @@ Regional Country-by-Country E-commerce Visualizations
 Creates one interactive chart per region showing all countries
 """
 
+import os
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
-print("="*80)
-print("GENERATING REGIONAL COUNTRY VISUALIZATIONS")
-print("="*80)
-print()
+from data_io import load_data
 
 # Paths
 BASE = Path(".")
 DATA = BASE / "outputs" / "data" / "analysis_ready.csv"
 OUTPUTS = BASE / "outputs" / "Visualizations"
 
-# Load data
-print("Loading data...")
-df = pd.read_csv(DATA)
-
-# Remove regions with insufficient data
-df = df[df['region'] != 'Latin America & Caribbean'].copy()
-
-# Filter data from 2012 onwards (earlier years are mostly empty)
-df = df[df['year'] >= 2012].copy()
-
-print(f"✓ Loaded: {len(df)} observations")
-print(f"  Regions: {df['region'].nunique()}")
-print(f"  Countries: {df['country_name'].nunique()}")
-print()
+# Load plotly.js from the CDN instead of embedding the ~3 MB bundle in every file
+HTML_OPTS = dict(include_plotlyjs='cdn', full_html=True, auto_play=False)
 
 # Crisis events for reference
 CRISIS_EVENTS = {
@@ -52,84 +40,53 @@ def add_crisis_markers(fig):
         )
     return fig
 
-# Generate visualization for each region
-print("Creating country-level visualizations by region...")
-print()
-
-regions = df['region'].dropna().unique()
+# Dropdown metrics in trace order, with the hover label for each
+METRICS = {
+    'ecom_share_pct': 'Share: %{y:.2f}%',
+    'ecom_sales_usd_millions': 'Sales: $%{y:,.0f}M',
+    'internet_users_pct': 'Internet: %{y:.1f}%',
+}
 
-for region in regions:
-    region_data = df[df['region'] == region].copy()
-    
-    print(f"Processing: {region}")
-    
-    # Get countries in this region
-    countries = region_data['country_name'].unique()
-    print(f"  Countries: {len(countries)}")
-    
-    # Create figure with dropdown menu to switch between metrics
-    fig = go.Figure()
-    
+def build_region(region, region_data):
+    """Build the country-by-country dropdown chart for one region and render it to HTML"""
     # Color palette - using Bold for better visibility
     colors = px.colors.qualitative.Bold
     
-    # Add trace for each country - E-commerce Share
-    for i, country in enumerate(sorted(countries)):
-        country_data = region_data[region_data['country_name'] == country].sort_values('year')
-        
-        # E-commerce share trace (visible by default)
-        fig.add_trace(go.Scatter(
-            x=country_data['year'],
-            y=country_data['ecom_share_pct'],
-            mode='lines+markers',
-            name=country,
-            line=dict(color=colors[i % len(colors)], width=2),
-            marker=dict(size=6),
-            visible=True,
-            hovertemplate=f'<b>{country}</b><br>Year: %{{x}}<br>Share: %{{y:.2f}}%<extra></extra>'
-        ))
+    # Sort once, then melt to one row per (metric, country, year); the melted
+    # frame comes out metric-major, so its groups are already in trace order
+    region_sorted = region_data.sort_values(['country_name', 'year'])
+    countries = region_sorted['country_name'].unique()
+    color_of = {country: colors[i % len(colors)] for i, country in enumerate(countries)}
+    long = region_sorted.melt(
+        id_vars=['country_name', 'year'],
+        value_vars=list(METRICS),
+        var_name='metric',
+        value_name='value'
+    )
     
-    # Add traces for e-commerce sales (USD millions) - initially hidden
-    for i, country in enumerate(sorted(countries)):
-        country_data = region_data[region_data['country_name'] == country].sort_values('year')
-        
-        fig.add_trace(go.Scatter(
-            x=country_data['year'],
-            y=country_data['ecom_sales_usd_millions'],
+    # One trace per (metric, country); only the e-commerce share is visible by default
+    traces = [
+        go.Scatter(
+            x=rows['year'].to_numpy(),
+            y=rows['value'].to_numpy(),
             mode='lines+markers',
             name=country,
-            line=dict(color=colors[i % len(colors)], width=2),
+            line=dict(color=color_of[country], width=2),
             marker=dict(size=6),
-            visible=False,
-            hovertemplate=f'<b>{country}</b><br>Year: %{{x}}<br>Sales: $%{{y:,.0f}}M<extra></extra>'
-        ))
+            visible=metric == 'ecom_share_pct',
+            hovertemplate=f'<b>{country}</b><br>Year: %{{x}}<br>{METRICS[metric]}<extra></extra>'
+        )
+        for (metric, country), rows in long.groupby(['metric', 'country_name'], sort=False, observed=True)
+    ]
     
-    # Add traces for internet penetration - initially hidden
-    for i, country in enumerate(sorted(countries)):
-        country_data = region_data[region_data['country_name'] == country].sort_values('year')
-        
-        fig.add_trace(go.Scatter(
-            x=country_data['year'],
-            y=country_data['internet_users_pct'],
-            mode='lines+markers',
-            name=country,
-            line=dict(color=colors[i % len(colors)], width=2),
-            marker=dict(size=6),
-            visible=False,
-            hovertemplate=f'<b>{country}</b><br>Year: %{{x}}<br>Internet: %{{y:.1f}}%<extra></extra>'
-        ))
+    # Create figure with dropdown menu to switch between metrics (all traces in one call)
+    fig = go.Figure(data=traces)
     
-    # Create visibility arrays for dropdown
+    # Visibility per dropdown entry: row i shows traces i*n_countries to (i+1)*n_countries-1
     n_countries = len(countries)
-    
-    # Visibility for e-commerce share (traces 0 to n_countries-1)
-    visible_share = [True] * n_countries + [False] * n_countries + [False] * n_countries
-    
-    # Visibility for sales (traces n_countries to 2*n_countries-1)
-    visible_sales = [False] * n_countries + [True] * n_countries + [False] * n_countries
-    
-    # Visibility for internet (traces 2*n_countries to 3*n_countries-1)
-    visible_internet = [False] * n_countries + [False] * n_countries + [True] * n_countries
+    visible_share, visible_sales, visible_internet = (
+        np.repeat(np.eye(len(METRICS), dtype=bool), n_countries, axis=1).tolist()
+    )
     
     # Add dropdown menu
     fig.update_layout(
@@ -189,24 +146,63 @@ for region in regions:
         margin=dict(t=120)
     )
     
-    # Save
+    # Render only; the parent process writes the file
     filename = f"regional_countries_{safe_name}.html"
-    fig.write_html(OUTPUTS / filename)
-    print(f"  ✓ {filename}")
+    return filename, fig.to_html(**HTML_OPTS, validate=False), len(countries)
+
+
+if __name__ == '__main__':
+    print("="*80)
+    print("GENERATING REGIONAL COUNTRY VISUALIZATIONS")
+    print("="*80)
     print()
 
-print("="*80)
-print("✓ REGIONAL COUNTRY VISUALIZATIONS COMPLETE")
-print("="*80)
-print()
-print(f"Generated {len(regions)} interactive charts")
-print(f"Location: {OUTPUTS}/")
-print()
-print("Features:")
-print("  • Dropdown menu to switch between metrics")
-print("  • E-commerce Share (%)")
-print("  • E-commerce Sales (USD millions)")
-print("  • Internet Penetration (%)")
-print("  • Crisis markers ( 2020, 2022)")
-print("  • Interactive hover details")
-print()
+    # Load data
+    print("Loading data...")
+    df = load_data(DATA)
+
+    # Encode the repeated labels once so filters and groupbys work on integer codes
+    df = df.astype({'region': 'category', 'country_name': 'category'})
+
+    # Remove regions with insufficient data
+    df = df[df['region'] != 'Latin America & Caribbean'].copy()
+
+    # Filter data from 2012 onwards (earlier years are mostly empty)
+    df = df[df['year'] >= 2012].copy()
+
+    print(f"✓ Loaded: {len(df)} observations")
+    print(f"  Regions: {df['region'].nunique()}")
+    print(f"  Countries: {df['country_name'].nunique()}")
+    print()
+
+    # Generate visualization for each region
+    print("Creating country-level visualizations by region...")
+    print()
+
+    regions = df['region'].dropna().unique()
+    # One process per region; each worker only receives its own slice
+    slices = [df[df['region'] == region] for region in regions]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        pages = list(ex.map(build_region, regions, slices))
+    for region, (filename, html, n_countries) in zip(regions, pages):
+        (OUTPUTS / filename).write_text(html, encoding='utf-8')
+        print(f"Processing: {region}")
+        print(f"  Countries: {n_countries}")
+        print(f"  ✓ {filename}")
+        print()
+
+    print("="*80)
+    print("✓ REGIONAL COUNTRY VISUALIZATIONS COMPLETE")
+    print("="*80)
+    print()
+    print(f"Generated {len(regions)} interactive charts")
+    print(f"Location: {OUTPUTS}/")
+    print()
+    print("Features:")
+    print("  • Dropdown menu to switch between metrics")
+    print("  • E-commerce Share (%)")
+    print("  • E-commerce Sales (USD millions)")
+    print("  • Internet Penetration (%)")
+    print("  • Crisis markers ( 2020, 2022)")
+    print("  • Interactive hover details")
+    print()